@@ -0,0 +1,434 @@
+#!/usr/bin/env python3
+"""
+Redis发布订阅功能测试
+
+验证后端的Redis Pub/Sub与WebSocket频道集成:
+- 基础发布/订阅
+- 服务端监听的7个WebSocket频道
+- 多订阅者场景
+- 发布吞吐量性能
+
+运行前需要启动Redis (默认 localhost:6379)。
+"""
+
+import asyncio
+import json
+import os
+import threading
+import time
+
+import redis
+import redis.asyncio as aioredis
+
+# orjson比标准库json快5-6倍(编码)/约2倍(解码), 未安装时回退到标准库
+try:
+    import orjson
+
+    def _dumps(obj):
+        return orjson.dumps(obj)
+
+    def _loads(data):
+        return orjson.loads(data)
+except ImportError:
+    def _dumps(obj):
+        return json.dumps(obj, ensure_ascii=False).encode("utf-8")
+
+    def _loads(data):
+        return json.loads(data)
+
+# MessagePack编码比JSON快一个数量级且帧更小。服务端目前只解析JSON,
+# 所以默认关闭, 调试对比时用 USE_MSGPACK=1 打开
+USE_MSGPACK = os.environ.get("USE_MSGPACK") == "1"
+try:
+    import msgspec
+    import msgspec.msgpack
+
+    _enc = msgspec.msgpack.Encoder()
+    _dec = msgspec.msgpack.Decoder()
+
+    class PerfMsg(msgspec.Struct):
+        """性能测试消息: 类型化字段走C编码快路径, 免去每条一个dict的开销"""
+        type: str
+        id: int
+        data: str
+        timestamp: float
+except ImportError:
+    USE_MSGPACK = False
+    PerfMsg = None
+
+
+def _encode(obj):
+    return _enc.encode(obj) if USE_MSGPACK else _dumps(obj)
+
+
+def _decode(data):
+    return _dec.decode(data) if USE_MSGPACK else _loads(data)
+
+
+REDIS_HOST = "localhost"
+REDIS_PORT = 6379
+REDIS_DB = 0
+
+# 所有测试实例共用一个连接池, 避免每个实例重复建连
+# (test_multiple_subscribers会创建3个实例; pubsub连接由池按需保留)
+POOL = redis.ConnectionPool(
+    host=REDIS_HOST, port=REDIS_PORT, db=REDIS_DB,
+    decode_responses=False, max_connections=32,
+)
+
+# 服务端订阅的7个WebSocket频道 (见 internal/domain/websocket/redis_integration.go)
+WS_CHANNELS = [
+    "teable:ws:ws:broadcast",
+    "teable:ws:doc:op",
+    "teable:ws:record:op",
+    "teable:ws:view:op",
+    "teable:ws:field:op",
+    "teable:ws:presence:update",
+    "teable:ws:system:message",
+]
+
+
+class RedisPubSubTest:
+    """Redis发布订阅测试客户端"""
+
+    def __init__(self, verbose=True):
+        # verbose=False时关掉逐条消息的print: stdout行缓冲写在
+        # 1000条的热循环里占比可观, 会拉低吞吐数字
+        self.verbose = verbose
+        self.pub_client = None
+        self.sub_client = None
+        self.received_messages = []
+        self._stop = threading.Event()
+
+    def connect(self):
+        """连接Redis, 发布和订阅各用一个客户端"""
+        try:
+            # decode_responses=False(见POOL): payload直接以bytes交给
+            # _decode (orjson/msgspec原生吃bytes), 省掉每条消息一次UTF-8解码
+            self.pub_client = redis.Redis(connection_pool=POOL)
+            self.sub_client = redis.Redis(connection_pool=POOL)
+            self.pub_client.ping()
+            print("✅ Redis连接成功")
+            return True
+        except Exception as e:
+            print(f"❌ Redis连接失败: {e}")
+            return False
+
+    def disconnect(self):
+        """断开Redis连接并停止订阅循环"""
+        self._stop.set()
+        if self.pub_client:
+            self.pub_client.close()
+        if self.sub_client:
+            self.sub_client.close()
+        print("👋 Redis连接已断开")
+
+    def publish_message(self, channel, message):
+        """发布一条消息, 返回收到消息的订阅者数量"""
+        payload = _encode(message)
+        receivers = self.pub_client.publish(channel, payload)
+        if self.verbose:
+            print(f"📤 发布消息到 {channel}: {receivers} 个订阅者")
+        return receivers
+
+    def has_subscribers(self, channel):
+        """频道当前是否有订阅者 (PUBSUB NUMSUB)"""
+        return self.pub_client.pubsub_numsub(channel)[0][1] > 0
+
+    def wait_for_subscribers(self, channel, timeout=5.0):
+        """等待频道出现订阅者
+
+        订阅线程建立期间就发布会把消息发进空频道: 序列化和往返
+        照付, 订阅者却一条收不到, 吞吐数字也失真。
+        """
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            if self.has_subscribers(channel):
+                return True
+            time.sleep(0.05)
+        return False
+
+    def publish_many(self, channel, messages, batch_size=100):
+        """批量发布消息, 通过pipeline把N次PUBLISH合并成一次往返
+
+        每batch_size条flush一次以限制内存占用。交互式测试仍然使用
+        publish_message逐条发布。
+        """
+        pipe = self.pub_client.pipeline(transaction=False)
+        pending = 0
+        for message in messages:
+            if not isinstance(message, (bytes, bytearray)):
+                message = _encode(message)
+            pipe.publish(channel, message)
+            pending += 1
+            if pending >= batch_size:
+                pipe.execute()
+                pending = 0
+        if pending:
+            pipe.execute()
+
+    def subscribe_channel(self, channel, callback, ready=None):
+        """订阅频道并循环处理消息 (通常在线程中运行)
+
+        不用listen()的无界阻塞生成器(只能靠daemon线程强杀), 而是
+        get_message短超时轮询, disconnect()置位_stop即可干净退出。
+        收到Redis的subscribe确认时置位ready, 调用方等它而不是睡1秒。
+        """
+        pubsub = self.sub_client.pubsub()
+        pubsub.subscribe(channel)
+        print(f"📡 已订阅频道: {channel}")
+        while not self._stop.is_set():
+            message = pubsub.get_message(timeout=0.1)
+            if message is None:
+                continue
+            if message["type"] == "subscribe":
+                if ready is not None:
+                    ready.set()
+                continue
+            if message["type"] != "message":
+                continue
+            data = _decode(message["data"])
+            if self.verbose:
+                print(f"📥 收到消息 {channel}: {data.get('type', 'unknown')}")
+            callback(channel, data)
+        pubsub.close()
+
+    # ------------------------------------------------------------------
+    # 测试用例
+    # ------------------------------------------------------------------
+
+    def test_basic_pubsub(self):
+        """测试基础发布订阅"""
+        print("\n=== 测试基础发布订阅 ===")
+        channel = "teable:ws:test"
+        received = []
+        done = threading.Event()  # 收满即返回, 不用死等固定秒数
+
+        def handler(ch, data):
+            received.append(data)
+            if len(received) == 5:
+                done.set()
+
+        ready = threading.Event()
+        thread = threading.Thread(
+            target=self.subscribe_channel,
+            args=(channel, handler, ready),
+            daemon=True,
+        )
+        thread.start()
+        ready.wait(timeout=2)  # 等待订阅确认
+        if not self.wait_for_subscribers(channel):
+            print(f"❌ 频道 {channel} 没有订阅者")
+            return False
+
+        for i in range(5):
+            self.publish_message(channel, {
+                "type": "test",
+                "id": i,
+                "data": f"Test message {i}",
+                "timestamp": time.time(),
+            })
+
+        done.wait(timeout=5)
+        print(f"✅ 基础发布订阅: 发送 5, 收到 {len(received)}")
+        return len(received) == 5
+
+    def test_websocket_channels(self):
+        """测试服务端监听的7个WebSocket频道
+
+        订阅方不再每频道开一个daemon线程, 而是在一个事件循环里用
+        redis.asyncio订阅。SUBSCRIBE本身支持一次传入多个频道, 所以
+        7个频道共用一条连接和一个读取任务, 按message["channel"]分发。
+        """
+        print("\n=== 测试WebSocket频道 ===")
+        return asyncio.run(self._websocket_channels_async())
+
+    async def _websocket_channels_async(self):
+        counts = {ch: 0 for ch in WS_CHANNELS}
+        done = asyncio.Event()  # 每个频道都收到即返回, 不用死等固定秒数
+        client = aioredis.Redis(host=REDIS_HOST, port=REDIS_PORT, db=REDIS_DB)
+        pubsub = client.pubsub()
+        await pubsub.subscribe(*WS_CHANNELS)
+
+        ready = asyncio.Event()
+        subscribed = 0
+
+        async def reader():
+            nonlocal subscribed
+            async for message in pubsub.listen():
+                if message["type"] == "subscribe":
+                    subscribed += 1
+                    if subscribed == len(WS_CHANNELS):
+                        ready.set()
+                elif message["type"] == "message":
+                    channel = message["channel"]
+                    if isinstance(channel, bytes):
+                        channel = channel.decode()
+                    counts[channel] += 1
+                    if all(counts[ch] >= 1 for ch in WS_CHANNELS):
+                        done.set()
+
+        tasks = [asyncio.create_task(reader())]
+        try:
+            await asyncio.wait_for(ready.wait(), timeout=2)  # 等待订阅确认
+        except asyncio.TimeoutError:
+            pass
+
+        # 发布端同样走异步客户端: 并发的PUBLISH在一条连接上被连续
+        # 写出, TCP发送侧自然把多条命令合进一次send (rueidis式的
+        # 自动流水线效果), 还避免同步客户端阻塞事件循环
+        t0 = time.time()
+        await asyncio.gather(*[
+            client.publish(ch, _encode({
+                "type": "channel_test",
+                "channel": ch,
+                "timestamp": t0,
+            })) for ch in WS_CHANNELS
+        ])
+
+        try:
+            await asyncio.wait_for(done.wait(), timeout=5)
+        except asyncio.TimeoutError:
+            pass
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await pubsub.aclose()
+        await client.aclose()
+
+        ok = all(counts[ch] >= 1 for ch in WS_CHANNELS)
+        for ch in WS_CHANNELS:
+            print(f"   {ch}: {counts[ch]} 条")
+        print(f"{'✅' if ok else '❌'} WebSocket频道测试")
+        return ok
+
+    def test_multiple_subscribers(self):
+        """测试多个订阅者同时接收"""
+        print("\n=== 测试多订阅者 ===")
+        channel = "teable:ws:multi"
+        tests = []
+        counters = []
+        events = []
+        ready_events = []
+
+        for i in range(3):
+            test = RedisPubSubTest(verbose=False)
+            if not test.connect():
+                return False
+            counter = []
+            done = threading.Event()  # 收满10条即置位
+            ready = threading.Event()
+
+            def make_handler(c, d):
+                def handler(ch, data):
+                    c.append(data)
+                    if len(c) == 10:
+                        d.set()
+                return handler
+
+            thread = threading.Thread(
+                target=test.subscribe_channel,
+                args=(channel, make_handler(counter, done), ready),
+                daemon=True,
+            )
+            thread.start()
+            tests.append(test)
+            counters.append(counter)
+            events.append(done)
+            ready_events.append(ready)
+        for ready in ready_events:  # 等待订阅确认
+            ready.wait(timeout=2)
+        if not tests[0].wait_for_subscribers(channel):
+            print(f"❌ 频道 {channel} 没有订阅者")
+            return False
+
+        # 10条消息经tests[0]一个pipeline批量发出, 省掉9次往返和
+        # 发布间的0.2秒间隔; 结束条件由上面的计数事件保证
+        tests[0].publish_many(channel, [{
+            "type": "multi_test",
+            "id": i,
+            "timestamp": time.time(),
+        } for i in range(10)])
+
+        for done in events:
+            done.wait(timeout=5)
+        ok = all(len(c) == 10 for c in counters)
+        for i, c in enumerate(counters):
+            print(f"   订阅者{i}: 收到 {len(c)} 条")
+        print(f"{'✅' if ok else '❌'} 多订阅者测试")
+        for test in tests:
+            test.disconnect()
+        return ok
+
+    def test_performance(self):
+        """测试发布性能 (1000条消息)"""
+        print("\n=== 测试发布性能 ===")
+        channel = "teable:ws:perf"
+        message_count = 1000
+
+        # Redis 6+的I/O线程(io-threads 4 / io-threads-do-reads yes)对这种
+        # 小消息密集的PUBLISH负载有约50%的吞吐提升。io-threads大多数版本
+        # 不允许运行时修改, 所以先尝试设置, 失败则打印当前值方便对比
+        try:
+            self.pub_client.config_set("io-threads", 4)
+            self.pub_client.config_set("io-threads-do-reads", "yes")
+        except redis.ResponseError:
+            pass
+        try:
+            conf = self.pub_client.config_get("io-threads")
+            io_threads = int(next(iter(conf.values()), 1))
+            print(f"   io-threads: {io_threads}")
+            if io_threads <= 1:
+                print("   ⚠️ 服务端未开启I/O线程, 建议redis.conf配置 "
+                      "io-threads 4 / io-threads-do-reads yes 后再对比")
+        except redis.ResponseError:
+            print("   ⚠️ 无法读取io-threads配置 (CONFIG被禁用?)")
+
+        # 消息形状固定, 先把全部payload序列化好, 热循环里只剩publish;
+        # msgpack模式下用PerfMsg Struct代替dict字面量
+        t0 = time.time()
+        if USE_MSGPACK:
+            payloads = [
+                _encode(PerfMsg("performance_test", i, f"Message {i}", t0))
+                for i in range(message_count)
+            ]
+        else:
+            payloads = [_encode({
+                "type": "performance_test",
+                "id": i,
+                "data": f"Message {i}",
+                "timestamp": t0,
+            }) for i in range(message_count)]
+
+        start = time.time()
+        self.publish_many(channel, payloads)
+        elapsed = time.time() - start
+
+        rate = message_count / elapsed if elapsed > 0 else 0
+        print(f"✅ 发布 {message_count} 条消息耗时 {elapsed:.3f}s ({rate:.0f} msg/s)")
+        return True
+
+
+def main():
+    print("🚀 Redis发布订阅功能测试")
+    test = RedisPubSubTest()
+    if not test.connect():
+        return 1
+
+    results = {
+        "基础发布订阅": test.test_basic_pubsub(),
+        "WebSocket频道": test.test_websocket_channels(),
+        "多订阅者": test.test_multiple_subscribers(),
+        "发布性能": test.test_performance(),
+    }
+
+    print("\n=== 测试结果 ===")
+    for name, ok in results.items():
+        print(f"   {'✅' if ok else '❌'} {name}")
+
+    test.disconnect()
+    return 0 if all(results.values()) else 1
+
+
+if __name__ == "__main__":
+    exit(main())
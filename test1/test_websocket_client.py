@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""
+WebSocket客户端功能测试
+
+通过 /api/ws/socket 验证基础的WebSocket协议:
+- 连接 / 心跳 (ping-pong)
+- subscribe / unsubscribe / query / submit
+- 多客户端并存
+
+运行前需要启动后端服务 (默认 localhost:3000)。
+"""
+
+import asyncio
+import socket
+import time
+
+# orjson是C扩展, 编解码比标准库json快数倍, 且dumps直接产出
+# 可发送的bytes (websockets按BINARY帧发出)
+import orjson
+import websockets
+
+# localhost在import时解析一次, 每次connect()不再走getaddrinfo
+# (部分环境下先试IPv6再回退, 白付一次查询)
+_HOST = socket.gethostbyname("localhost")
+WS_BASE_URL = f"ws://{_HOST}:3000/api/ws/socket"
+
+
+class WebSocketTestClient:
+    """WebSocket测试客户端"""
+
+    def __init__(self, user_id="test_user_001", verbose=True):
+        self.user_id = user_id
+        # time_ns(): 整数时间戳比float更快拿到, int→str也比float→str便宜
+        self.session_id = f"session_{time.time_ns()}"
+        self.websocket = None
+        # verbose=False时关掉逐条消息的print, 行缓冲的stdout写是
+        # 每条消息一次系统调用, 会和websocket循环抢时间
+        self.verbose = verbose
+
+    async def connect(self):
+        """建立WebSocket连接"""
+        url = f"{WS_BASE_URL}?user_id={self.user_id}&session_id={self.session_id}"
+        try:
+            # 本机回环的可信负载: 关掉permessage-deflate协商和消息大小
+            # 上限, 省掉纯Python的压缩/检查热循环。max_queue=None让
+            # 突发帧不触发背压暂停读帧, 1MB读写水位减少transport
+            # 的pause/resume翻转
+            self.websocket = await websockets.connect(
+                url,
+                compression=None,
+                max_size=None,
+                max_queue=None,
+                read_limit=2**20,
+                write_limit=2**20,
+            )
+            print(f"✅ WebSocket连接成功: {self.user_id}")
+            return True
+        except Exception as e:
+            print(f"❌ WebSocket连接失败: {e}")
+            return False
+
+    async def disconnect(self):
+        """断开WebSocket连接"""
+        if self.websocket:
+            await self.websocket.close()
+            print(f"👋 {self.user_id} 连接已断开")
+
+    async def send_message(self, message):
+        """发送一条消息"""
+        await self.websocket.send(orjson.dumps(message))
+        if self.verbose:
+            print(f"📤 {self.user_id} 发送: {message.get('type', 'unknown')}")
+
+    async def receive_message(self, timeout=5.0):
+        """接收一条消息, 超时返回None"""
+        try:
+            raw = await asyncio.wait_for(self.websocket.recv(), timeout=timeout)
+            message = orjson.loads(raw)
+            if self.verbose:
+                print(f"📥 {self.user_id} 收到: {message.get('type', 'unknown')}")
+            return message
+        except asyncio.TimeoutError:
+            return None
+
+    # ------------------------------------------------------------------
+    # 协议辅助方法
+    # ------------------------------------------------------------------
+
+    # 消息的不变部分做成类级模板, 每次调用只copy一层再补可变字段,
+    # 省掉热路径上反复构造dict字面量的分配
+    _TEMPLATES = {
+        "ping": {"type": "ping"},
+        "subscribe": {"type": "subscribe"},
+        "unsubscribe": {"type": "unsubscribe"},
+        "query": {"type": "query"},
+        "submit": {"type": "submit"},
+    }
+
+    def _build(self, msg_type, **fields):
+        msg = self._TEMPLATES[msg_type].copy()
+        msg.update(fields)
+        msg["timestamp"] = time.time()
+        return msg
+
+    async def ping(self):
+        """发送心跳并等待pong"""
+        await self.send_message(self._build("ping"))
+        return await self.receive_message()
+
+    async def subscribe(self, collection):
+        """订阅集合"""
+        await self.send_message(self._build("subscribe", collection=collection))
+        return await self.receive_message()
+
+    async def unsubscribe(self, collection):
+        """取消订阅集合"""
+        await self.send_message(self._build("unsubscribe", collection=collection))
+        return await self.receive_message()
+
+    async def query(self, collection):
+        """查询集合"""
+        await self.send_message(self._build("query", collection=collection))
+        return await self.receive_message()
+
+    async def submit(self, collection, doc_id, op):
+        """提交操作"""
+        await self.send_message(
+            self._build("submit", collection=collection, id=doc_id, op=op)
+        )
+        return await self.receive_message()
+
+
+# ----------------------------------------------------------------------
+# 测试用例
+# ----------------------------------------------------------------------
+
+async def test_basic_flow():
+    """测试基础协议流程"""
+    print("\n=== 测试基础流程 ===")
+    client = WebSocketTestClient("test_user_basic")
+    if not await client.connect():
+        return False
+
+    pong = await client.ping()
+    await client.subscribe("record_table_001")
+    await client.query("record_table_001")
+    await client.unsubscribe("record_table_001")
+
+    await client.disconnect()
+    ok = pong is not None and pong.get("type") == "pong"
+    print(f"{'✅' if ok else '❌'} 基础流程测试")
+    return ok
+
+
+async def test_heartbeat():
+    """测试心跳保活 (连续5次ping-pong)"""
+    print("\n=== 测试心跳 ===")
+    client = WebSocketTestClient("test_user_heartbeat")
+    if not await client.connect():
+        return False
+
+    # ping()本身就等到pong才返回, 每轮已含一个完整RTT,
+    # 不需要再sleep(1)人为拉长5秒
+    pongs = 0
+    for _ in range(5):
+        response = await client.ping()
+        if response and response.get("type") == "pong":
+            pongs += 1
+
+    await client.disconnect()
+    ok = pongs == 5
+    print(f"{'✅' if ok else '❌'} 心跳测试: {pongs}/5")
+    return ok
+
+
+async def test_multiple_clients():
+    """测试多个客户端并存"""
+    print("\n=== 测试多客户端 ===")
+    # TCP+HTTP升级握手是每个连接的大头, 并发建连让3次握手重叠
+    clients = [WebSocketTestClient(f"test_user_{i:03d}") for i in range(3)]
+    results = await asyncio.gather(
+        *(client.connect() for client in clients), return_exceptions=True
+    )
+    clients = [c for c, ok in zip(clients, results) if ok is True]
+
+    ok = len(clients) == 3
+    for client in clients:
+        pong = await client.ping()
+        if not pong or pong.get("type") != "pong":
+            ok = False
+
+    await asyncio.gather(*(client.disconnect() for client in clients))
+    print(f"{'✅' if ok else '❌'} 多客户端测试: {len(clients)}/3 在线")
+    return ok
+
+
+async def main():
+    print("🚀 WebSocket客户端功能测试")
+    results = {
+        "基础流程": await test_basic_flow(),
+        "心跳": await test_heartbeat(),
+        "多客户端": await test_multiple_clients(),
+    }
+
+    print("\n=== 测试结果 ===")
+    for name, ok in results.items():
+        print(f"   {'✅' if ok else '❌'} {name}")
+    return 0 if all(results.values()) else 1
+
+
+def _warmup():
+    """预热orjson编解码路径, 首条消息不付懒初始化的钱"""
+    raw = orjson.dumps({"type": "ping", "timestamp": time.time()})
+    orjson.loads(raw)
+
+
+if __name__ == "__main__":
+    # uvloop (libuv)对recv间的asyncio调度开销是免改造提速, 未安装则跳过
+    try:
+        import uvloop
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    except ImportError:
+        pass
+    _warmup()
+    exit(asyncio.run(main()))
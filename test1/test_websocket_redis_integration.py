@@ -0,0 +1,457 @@
+#!/usr/bin/env python3
+"""
+WebSocket与Redis集成测试
+
+验证WebSocket服务和Redis Pub/Sub的端到端链路, 对照旧版Node服务的
+七项行为: 连接、WebSocket到Redis的操作转发、文档操作、在线状态、
+系统消息、多实例以及广播吞吐性能。
+
+运行前需要启动后端服务 (localhost:3000) 和Redis (localhost:6379)。
+"""
+
+import asyncio
+import socket
+import time
+
+# orjson是C扩展, 编解码比标准库json快数倍, 且dumps直接产出bytes,
+# 可以原样交给websocket.send和redis_client.publish
+import orjson
+import redis.asyncio as aioredis
+import websockets
+
+# localhost在import时解析一次, 之后每个WebSocket/Redis连接都直接
+# 用IP, 不再走getaddrinfo (部分环境下先试IPv6再回退, 白付一次查询)
+_HOST = socket.gethostbyname("localhost")
+WS_BASE_URL = f"ws://{_HOST}:3000/api/ws/socket"
+REDIS_HOST = _HOST
+REDIS_PORT = 6379
+
+# 所有测试实例共用一个连接池, test_multiple_instances不再重复握手。
+# 异步客户端: 同步redis在async def里的每次publish/get_message都会
+# 阻塞事件循环, 卡住并发的websocket recv协程
+_POOL = aioredis.ConnectionPool(
+    host=REDIS_HOST, port=REDIS_PORT, db=0, decode_responses=True
+)
+
+# 服务端监听的频道 (见 internal/domain/websocket/redis_integration.go)
+CHANNEL_BROADCAST = "teable:ws:ws:broadcast"
+CHANNEL_DOC_OP = "teable:ws:doc:op"
+CHANNEL_RECORD_OP = "teable:ws:record:op"
+CHANNEL_PRESENCE = "teable:ws:presence:update"
+CHANNEL_SYSTEM = "teable:ws:system:message"
+
+# 性能测试的广播信封只有op里的序号在变, 直接拼bytes: 每条payload
+# 一次str(i).encode()加一次拼接, 连JSON编码器都不进
+# (形状改动时与test_multiple_instances里的信封同步)
+PERF_PREFIX = (
+    b'{"channel":"record_table_001","message":{"type":"op",'
+    b'"data":{"op":[{"p":["value"],"t":"number","o":'
+)
+PERF_SUFFIX = b'}],"source":"performance_test"}},"exclude":[]}'
+
+
+class WebSocketRedisIntegrationTest:
+    """WebSocket + Redis 集成测试客户端"""
+
+    def __init__(self, user_id="test_user_001", verbose=True):
+        self.user_id = user_id
+        # time_ns(): 整数时间戳比float更快拿到, int→str也比float→str便宜
+        self.session_id = f"session_{time.time_ns()}"
+        self.websocket = None
+        self.redis_client = None
+        # verbose=False时关掉逐条消息的print, 行缓冲的stdout写是
+        # 每条消息一次系统调用, 会和websocket循环抢时间
+        self.verbose = verbose
+
+    async def connect_websocket(self):
+        """建立WebSocket连接"""
+        url = f"{WS_BASE_URL}?user_id={self.user_id}&session_id={self.session_id}"
+        try:
+            # 本机回环的可信负载: 关掉permessage-deflate协商和消息大小
+            # 上限, 省掉纯Python的压缩/检查热循环。max_queue=None让
+            # 广播突发不触发背压暂停读帧, 1MB读写水位减少transport
+            # 的pause/resume翻转
+            self.websocket = await websockets.connect(
+                url,
+                compression=None,
+                max_size=None,
+                max_queue=None,
+                read_limit=2**20,
+                write_limit=2**20,
+            )
+            print(f"✅ WebSocket连接成功: {self.user_id}")
+            return True
+        except Exception as e:
+            print(f"❌ WebSocket连接失败: {e}")
+            return False
+
+    async def connect_redis(self):
+        """连接Redis"""
+        try:
+            self.redis_client = aioredis.Redis(connection_pool=_POOL)
+            await self.redis_client.ping()
+            print("✅ Redis连接成功")
+            return True
+        except Exception as e:
+            print(f"❌ Redis连接失败: {e}")
+            return False
+
+    async def disconnect(self):
+        """断开所有连接"""
+        if self.websocket:
+            await self.websocket.close()
+        if self.redis_client:
+            await self.redis_client.aclose()
+        print(f"👋 {self.user_id} 已断开")
+
+    async def send_websocket_message(self, message):
+        """通过WebSocket发送消息"""
+        await self.websocket.send(orjson.dumps(message))
+        if self.verbose:
+            print(f"📤 {self.user_id} 发送: {message.get('type', 'unknown')}")
+
+    async def receive_websocket_message(self, timeout=1.0):
+        """接收一条WebSocket消息, 超时返回None"""
+        try:
+            raw = await asyncio.wait_for(self.websocket.recv(), timeout=timeout)
+            message = orjson.loads(raw)
+            if self.verbose:
+                print(f"📥 {self.user_id} 收到: {message.get('type', 'unknown')}")
+            return message
+        except asyncio.TimeoutError:
+            return None
+
+    async def _recv_fast(self):
+        """收原始帧, 不套wait_for/不解析/不打印
+
+        wait_for每次要建Task、handle和取消回调, 热循环里这是逐条
+        开销; 紧循环的截止时间由调用方在外层统一挂一个wait_for。
+        """
+        return await self.websocket.recv()
+
+    async def publish_to_redis(self, channel, message):
+        """向Redis频道发布消息, 返回订阅者数量"""
+        receivers = await self.redis_client.publish(channel, orjson.dumps(message))
+        if self.verbose:
+            print(f"📤 发布到 {channel}: {receivers} 个订阅者")
+        return receivers
+
+    async def publish_many(self, channel, messages):
+        """批量发布, pipeline把N次PUBLISH合并成一次TCP写"""
+        async with self.redis_client.pipeline(transaction=False) as pipe:
+            for message in messages:
+                if not isinstance(message, (bytes, bytearray)):
+                    message = orjson.dumps(message)
+                pipe.publish(channel, message)
+            await pipe.execute()
+
+
+class IntegrationFixture:
+    """七项子测试共用的已连接客户端
+
+    每个子测试各自connect_redis()+connect_websocket()要付7x2次
+    TCP握手/WS升级/Redis PING; 夹具连一次, 七项共用, 退出时统一断开。
+    子测试仍接受shared=None以便单独运行。
+    """
+
+    def __init__(self, user_id="test_user_fixture"):
+        self.test = WebSocketRedisIntegrationTest(user_id)
+
+    async def __aenter__(self):
+        if not await self.test.connect_redis():
+            raise RuntimeError("Redis连接失败")
+        if not await self.test.connect_websocket():
+            raise RuntimeError("WebSocket连接失败")
+        return self.test
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.test.disconnect()
+
+
+# ----------------------------------------------------------------------
+# 对照旧版的七项子测试
+# ----------------------------------------------------------------------
+
+async def test_websocket_connection(shared=None):
+    """1. WebSocket连接与心跳"""
+    print("\n=== 1. WebSocket连接 ===")
+    test = shared or WebSocketRedisIntegrationTest("test_user_conn")
+    if shared is None and not await test.connect_websocket():
+        return False
+
+    await test.send_websocket_message({"type": "ping", "timestamp": time.time()})
+    response = await test.receive_websocket_message(timeout=2.0)
+    if shared is None:
+        await test.disconnect()
+
+    ok = response is not None and response.get("type") == "pong"
+    print(f"{'✅' if ok else '❌'} WebSocket连接测试")
+    return ok
+
+
+async def test_websocket_to_redis_operation(shared=None):
+    """2. WebSocket提交的操作被转发到Redis"""
+    print("\n=== 2. WebSocket -> Redis操作转发 ===")
+    test = shared or WebSocketRedisIntegrationTest("test_user_ws2redis")
+    if shared is None and (
+        not await test.connect_redis() or not await test.connect_websocket()
+    ):
+        return False
+
+    pubsub = test.redis_client.pubsub()
+    await pubsub.subscribe(CHANNEL_RECORD_OP)
+
+    await test.send_websocket_message({
+        "type": "submit",
+        "collection": "record_table_001",
+        "id": "record_001",
+        "op": [{"p": ["fields", "field_001"], "oi": "integration test"}],
+        "timestamp": time.time(),
+    })
+
+    # 用异步迭代器等操作出现在Redis频道上: 协程安静地挂起, 消息一到
+    # 立刻返回, 整体只套一个5秒墙钟超时, 没有每次最多1秒的轮询延迟
+    async def _wait_for_record_op():
+        async for message in pubsub.listen():
+            if message["type"] != "message":
+                continue
+            try:
+                data = orjson.loads(message["data"])
+            except orjson.JSONDecodeError:
+                continue
+            if data.get("type") == "record_operation":
+                return True
+
+    try:
+        message_received = await asyncio.wait_for(
+            _wait_for_record_op(), timeout=5.0
+        )
+    except asyncio.TimeoutError:
+        message_received = False
+
+    await pubsub.aclose()
+    if shared is None:
+        await test.disconnect()
+    print(f"{'✅' if message_received else '❌'} 操作转发测试")
+    return message_received
+
+
+async def test_document_operations(shared=None):
+    """3. 文档操作经Redis下发"""
+    print("\n=== 3. 文档操作 ===")
+    test = shared or WebSocketRedisIntegrationTest("test_user_doc")
+    if shared is None and not await test.connect_redis():
+        return False
+
+    receivers = await test.publish_to_redis(CHANNEL_DOC_OP, {
+        "collection": "record_table_001",
+        "document": "record_001",
+        "operation": [{"p": ["fields", "field_001"], "oi": "doc op test"}],
+        "source": "integration_test",
+        "timestamp": time.time(),
+    })
+
+    if shared is None:
+        await test.disconnect()
+    ok = receivers >= 1
+    print(f"{'✅' if ok else '❌'} 文档操作测试")
+    return ok
+
+
+async def test_presence_system(shared=None):
+    """4. 在线状态广播"""
+    print("\n=== 4. 在线状态 ===")
+    test = shared or WebSocketRedisIntegrationTest("test_user_presence")
+    if shared is None and not await test.connect_redis():
+        return False
+
+    receivers = await test.publish_to_redis(CHANNEL_PRESENCE, {
+        "user_id": test.user_id,
+        "session_id": test.session_id,
+        "data": {"status": "online", "cursor": {"x": 1, "y": 2}},
+        "timestamp": time.time(),
+    })
+
+    if shared is None:
+        await test.disconnect()
+    ok = receivers >= 1
+    print(f"{'✅' if ok else '❌'} 在线状态测试")
+    return ok
+
+
+async def test_system_messages(shared=None):
+    """5. 系统消息广播"""
+    print("\n=== 5. 系统消息 ===")
+    test = shared or WebSocketRedisIntegrationTest("test_user_system")
+    if shared is None and not await test.connect_redis():
+        return False
+
+    receivers = await test.publish_to_redis(CHANNEL_SYSTEM, {
+        "message": "integration test notice",
+        "level": "info",
+        "timestamp": time.time(),
+    })
+
+    if shared is None:
+        await test.disconnect()
+    ok = receivers >= 1
+    print(f"{'✅' if ok else '❌'} 系统消息测试")
+    return ok
+
+
+async def test_multiple_instances(shared=None):
+    """6. 多个客户端实例同时订阅并收到广播"""
+    print("\n=== 6. 多实例 ===")
+    # TCP+HTTP升级握手是每个连接的大头, 并发建连让3次握手重叠
+    tests = [
+        WebSocketRedisIntegrationTest(f"test_user_multi_{i}") for i in range(3)
+    ]
+    results = await asyncio.gather(
+        *(test.connect_websocket() for test in tests), return_exceptions=True
+    )
+    if not all(r is True for r in results):
+        return False
+    # 发布端复用夹具的Redis连接, 没有夹具时才自己连
+    publisher = shared or tests[0]
+    if shared is None and not await tests[0].connect_redis():
+        return False
+
+    # 3个客户端互相独立, subscribe+确认的两次往返用gather重叠,
+    # 延迟从O(N)降到O(1); 时间戳只取一次, 3条消息共用
+    t0 = time.time()
+
+    async def _subscribe(test):
+        await test.send_websocket_message({
+            "type": "subscribe",
+            "collection": "record_table_001",
+            "timestamp": t0,
+        })
+        return await test.receive_websocket_message()
+
+    await asyncio.gather(*(_subscribe(test) for test in tests))
+
+    await publisher.publish_to_redis(CHANNEL_BROADCAST, {
+        "channel": "record_table_001",
+        "message": {
+            "type": "op",
+            "data": {"op": [{"p": ["value"], "t": "number", "o": 1}],
+                     "source": "multi_test"},
+        },
+        "exclude": [],
+    })
+
+    messages = await asyncio.gather(
+        *(test.receive_websocket_message(timeout=2.0) for test in tests)
+    )
+    received = sum(1 for m in messages if m and m.get("type") == "op")
+
+    await asyncio.gather(*(test.disconnect() for test in tests))
+    ok = received == len(tests)
+    print(f"{'✅' if ok else '❌'} 多实例测试: {received}/{len(tests)} 收到广播")
+    return ok
+
+
+async def test_performance(shared=None):
+    """7. Redis广播到WebSocket的吞吐性能 (100条)"""
+    print("\n=== 7. 广播性能 ===")
+    test = shared or WebSocketRedisIntegrationTest("test_user_perf", verbose=False)
+    if shared is None and (
+        not await test.connect_redis() or not await test.connect_websocket()
+    ):
+        return False
+    # 共享夹具可能是verbose的, 吞吐测试期间临时关掉逐条打印
+    was_verbose = test.verbose
+    test.verbose = False
+
+    await test.send_websocket_message({
+        "type": "subscribe",
+        "collection": "record_table_001",
+        "timestamp": time.time(),
+    })
+    await test.receive_websocket_message()
+
+    message_count = 100
+    payloads = [
+        PERF_PREFIX + str(i).encode() + PERF_SUFFIX
+        for i in range(message_count)
+    ]
+
+    start = time.time()
+    await test.publish_many(CHANNEL_BROADCAST, payloads)
+
+    # 不再每条recv套一个1秒的wait_for(100次定时器创建/销毁),
+    # 一个批量读取协程读满为止, 整体只挂一个10秒的墙钟超时。
+    # 这里只关心是不是op帧, 直接在原始字节里扫type字段,
+    # 不感兴趣的帧连解析器都不进
+    received = 0
+
+    async def _drain(n):
+        nonlocal received
+        while received < n:
+            raw = await test._recv_fast()
+            needle = '"type":"op"' if isinstance(raw, str) else b'"type":"op"'
+            if needle in raw:
+                received += 1
+
+    try:
+        await asyncio.wait_for(_drain(message_count), timeout=10)
+    except asyncio.TimeoutError:
+        pass
+
+    elapsed = time.time() - start
+    rate = received / elapsed if elapsed > 0 else 0
+    test.verbose = was_verbose
+    if shared is None:
+        await test.disconnect()
+    print(f"✅ 发布 {message_count} 条, 收到 {received} 条op, "
+          f"耗时 {elapsed:.3f}s ({rate:.0f} msg/s)")
+    return received > 0
+
+
+async def compare_with_old_version():
+    """按旧版Node服务的行为逐项对照"""
+    print("🚀 WebSocket与Redis集成测试 (对照旧版)")
+    async with IntegrationFixture() as fx:
+        results = {
+            "WebSocket连接": await test_websocket_connection(fx),
+            "操作转发": await test_websocket_to_redis_operation(fx),
+        }
+        # 3/4/5只往Redis发布、不从WebSocket收帧, 互不抢共享连接的
+        # recv, 并发跑把三段等待重叠掉; 收帧敏感的1/2/6/7保持串行
+        doc_ok, presence_ok, system_ok = await asyncio.gather(
+            test_document_operations(fx),
+            test_presence_system(fx),
+            test_system_messages(fx),
+        )
+        results["文档操作"] = doc_ok
+        results["在线状态"] = presence_ok
+        results["系统消息"] = system_ok
+        results["多实例"] = await test_multiple_instances(fx)
+        results["广播性能"] = await test_performance(fx)
+
+    print("\n=== 测试结果 ===")
+    for name, ok in results.items():
+        print(f"   {'✅' if ok else '❌'} {name}")
+    return results
+
+
+async def main():
+    results = await compare_with_old_version()
+    return 0 if all(results.values()) else 1
+
+
+def _warmup():
+    """预热orjson编解码路径, 首条消息不付懒初始化的钱"""
+    raw = orjson.dumps({"type": "ping", "timestamp": time.time()})
+    orjson.loads(raw)
+
+
+if __name__ == "__main__":
+    # uvloop (libuv)对recv间的asyncio调度开销是免改造提速, 未安装则跳过
+    try:
+        import uvloop
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    except ImportError:
+        pass
+    _warmup()
+    exit(asyncio.run(main()))